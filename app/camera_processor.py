@@ -3,11 +3,35 @@ camera_processor.py
 
 Reads frames from the laptop webcam and computes an approximate
 brightness value (0-255, higher = brighter).
+
+Frames are grabbed continuously on a background thread so that
+read_brightness() never blocks on the camera and always sees the
+most recent frame rather than one queued up in the driver.
 """
 
+import sys
+import threading
+import time
+from typing import Optional
+
 import cv2
 import numpy as np
 
+# Only an average is needed, so ask the driver for a small stream and shrink
+# each frame further before reducing it.
+CAPTURE_WIDTH = 160
+CAPTURE_HEIGHT = 120
+THUMBNAIL_SIZE = (64, 64)
+
+# BT.601 luma weights in OpenCV's BGR channel order (same as COLOR_BGR2GRAY)
+LUMA_WEIGHTS_BGR = (0.114, 0.587, 0.299)
+
+# How long read_brightness() waits for the grabber's first frame
+FIRST_FRAME_TIMEOUT_SEC = 2.0
+
+# Frames older than this are treated as a dead camera rather than reused
+MAX_FRAME_AGE_SEC = 1.0
+
 
 class CameraProcessor:
     def __init__(self, camera_index: int = 0):
@@ -15,32 +39,89 @@ class CameraProcessor:
         :param camera_index: Index of the webcam (0 is usually the default).
         """
         self.camera_index = camera_index
-        self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
+        self._lock = threading.Lock()
+        self._latest: Optional[np.ndarray] = None
+        self._latest_time = 0.0
+        self._frame_ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # MSMF has lower per-frame latency than DSHOW on Windows; elsewhere
+        # let OpenCV pick the native backend (V4L2, AVFoundation, ...)
+        backend = cv2.CAP_MSMF if sys.platform == "win32" else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(self.camera_index, backend)
 
         if not self.cap.isOpened():
             raise RuntimeError(f"Could not open camera index {self.camera_index}")
 
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_WIDTH)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_HEIGHT)
+        # Keep the driver queue shallow so each read returns a fresh frame
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self._thread.start()
+
+    def _grab_loop(self) -> None:
+        """
+        Keep overwriting the single-slot latest frame until stopped.
+
+        The thread owns the capture once started and releases it on exit, so
+        it is never released while a cap.read() call is still in progress.
+        """
+        cap = self.cap
+        try:
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    # Back off briefly instead of spinning on a dead device
+                    self._stop.wait(0.05)
+                    continue
+                with self._lock:
+                    self._latest = frame
+                    self._latest_time = time.monotonic()
+                self._frame_ready.set()
+        finally:
+            cap.release()
+
     def read_brightness(self) -> float:
         """
-        Capture a single frame from the camera and return its average brightness
+        Take the most recently grabbed frame and return its average brightness
         in the range 0-255 (approx).
 
         :return: brightness value as float
         """
-        ret, frame = self.cap.read()
-        if not ret or frame is None:
+        if not self._frame_ready.wait(FIRST_FRAME_TIMEOUT_SEC):
+            raise RuntimeError("Failed to read frame from camera")
+
+        with self._lock:
+            frame = self._latest
+            frame_age = time.monotonic() - self._latest_time
+
+        if frame_age > MAX_FRAME_AGE_SEC:
             raise RuntimeError("Failed to read frame from camera")
 
-        # Convert to grayscale, then take mean value
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        brightness = float(np.mean(gray))
+        # Downsample, then weight the per-channel means instead of building
+        # a grayscale image: mean(gray) == sum(w_c * mean(channel_c)).
+        # Wrapping in UMat lets OpenCV's T-API run both passes on an OpenCL
+        # device when one is available, and on the CPU otherwise.
+        uframe = cv2.UMat(frame)
+        uframe = cv2.resize(uframe, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        means = cv2.mean(uframe)[:3]
+        brightness = float(sum(w * m for w, m in zip(LUMA_WEIGHTS_BGR, means)))
         return brightness
 
     def release(self) -> None:
-        """Release the camera resource."""
-        if self.cap is not None:
+        """Stop the grabber thread and release the camera resource."""
+        self._stop.set()
+        if self._thread is not None:
+            # The grabber releases the capture itself when its loop exits,
+            # even if that happens after this join times out.
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        elif self.cap is not None:
             self.cap.release()
-            self.cap = None
+        self.cap = None
 
     def __del__(self):
         self.release()
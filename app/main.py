@@ -18,7 +18,7 @@ import argparse
 import logging
 import time
 from collections import deque
-from typing import Deque, Optional
+from typing import Deque, List, Optional, Tuple
 
 import paho.mqtt.client as mqtt
 
@@ -68,32 +68,52 @@ def create_mqtt_client() -> mqtt.Client:
     return client
 
 
-def moving_average(history: Deque[float]) -> Optional[float]:
-    if not history:
-        return None
-    return sum(history) / len(history)
+class RollingMean:
+    """Fixed-window moving average with an O(1) running sum."""
 
+    def __init__(self, maxlen: int):
+        self._deque: Deque[float] = deque(maxlen=maxlen)
+        self._sum = 0.0
 
-def maybe_publish(
+    def add(self, value: float) -> None:
+        if len(self._deque) == self._deque.maxlen:
+            self._sum -= self._deque[0]
+        self._deque.append(value)
+        self._sum += value
+
+    def value(self) -> Optional[float]:
+        if not self._deque:
+            return None
+        return self._sum / len(self._deque)
+
+
+def flush_commands(
     client: mqtt.Client,
-    topic: str,
-    payload: str,
+    pending: List[Tuple[str, str]],
     last_sent_time: dict,
 ) -> None:
     """
-    Publish a command if enough time has passed since the last one on this topic.
+    Publish this iteration's queued (topic, payload) commands in one pass,
+    skipping any topic that was sent to less than MIN_CMD_INTERVAL_SEC ago.
     """
-    now = time.time()
-    last = last_sent_time.get(topic, 0.0)
-    if now - last < MIN_CMD_INTERVAL_SEC:
+    if not pending:
         return
 
-    result = client.publish(topic, payload=payload, qos=0, retain=False)
-    if result.rc == mqtt.MQTT_ERR_SUCCESS:
-        logging.info("MQTT publish: %s -> %s", topic, payload)
-        last_sent_time[topic] = now
-    else:
-        logging.warning("Failed to publish MQTT message: rc=%s", result.rc)
+    now = time.monotonic()
+    sent = []
+    for topic, payload in pending:
+        if now - last_sent_time.get(topic, float("-inf")) < MIN_CMD_INTERVAL_SEC:
+            continue
+
+        result = client.publish(topic, payload=payload, qos=0, retain=False)
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            last_sent_time[topic] = now
+            sent.append(f"{topic} -> {payload}")
+        else:
+            logging.warning("Failed to publish MQTT message to %s: rc=%s", topic, result.rc)
+
+    if sent:
+        logging.info("MQTT publish: %s", ", ".join(sent))
 
 
 def main() -> None:
@@ -109,8 +129,8 @@ def main() -> None:
     mic = MicrophoneProcessor()
     client = create_mqtt_client()
 
-    brightness_history: Deque[float] = deque(maxlen=HISTORY_LENGTH)
-    volume_history: Deque[float] = deque(maxlen=HISTORY_LENGTH)
+    brightness_history = RollingMean(HISTORY_LENGTH)
+    volume_history = RollingMean(HISTORY_LENGTH)
 
     last_cmd_time: dict = {}
 
@@ -118,13 +138,13 @@ def main() -> None:
 
     try:
         while True:
-            loop_start = time.time()
+            loop_start = time.monotonic()
 
             # 1) Measure brightness
             try:
                 brightness = camera.read_brightness()
-                brightness_history.append(brightness)
-                avg_brightness = moving_average(brightness_history)
+                brightness_history.add(brightness)
+                avg_brightness = brightness_history.value()
             except Exception as e:
                 logging.error("Error reading camera brightness: %s", e)
                 avg_brightness = None
@@ -132,8 +152,8 @@ def main() -> None:
             # 2) Measure volume
             try:
                 volume_db = mic.measure_volume_db()
-                volume_history.append(volume_db)
-                avg_volume_db = moving_average(volume_history)
+                volume_history.add(volume_db)
+                avg_volume_db = volume_history.value()
             except Exception as e:
                 logging.error("Error measuring microphone volume: %s", e)
                 avg_volume_db = None
@@ -147,20 +167,23 @@ def main() -> None:
             )
 
             # 3) Decision logic → MQTT commands
+            pending: List[Tuple[str, str]] = []
             if avg_brightness is not None:
                 if avg_brightness < BRIGHTNESS_LOW:
-                    maybe_publish(client, MQTT_TOPIC_LIGHT, "UP", last_cmd_time)
+                    pending.append((MQTT_TOPIC_LIGHT, "UP"))
                 elif avg_brightness > BRIGHTNESS_HIGH:
-                    maybe_publish(client, MQTT_TOPIC_LIGHT, "DOWN", last_cmd_time)
+                    pending.append((MQTT_TOPIC_LIGHT, "DOWN"))
 
             if avg_volume_db is not None:
                 if avg_volume_db > VOLUME_HIGH_DB:  # too loud (less negative)
-                    maybe_publish(client, MQTT_TOPIC_SPEAKER, "DOWN", last_cmd_time)
+                    pending.append((MQTT_TOPIC_SPEAKER, "DOWN"))
                 elif avg_volume_db < VOLUME_LOW_DB:  # too quiet
-                    maybe_publish(client, MQTT_TOPIC_SPEAKER, "UP", last_cmd_time)
+                    pending.append((MQTT_TOPIC_SPEAKER, "UP"))
+
+            flush_commands(client, pending, last_cmd_time)
 
             # 4) Sleep to keep a roughly fixed loop interval
-            elapsed = time.time() - loop_start
+            elapsed = time.monotonic() - loop_start
             to_sleep = max(0.0, LOOP_INTERVAL_SEC - elapsed)
             time.sleep(to_sleep)
 
@@ -169,6 +192,7 @@ def main() -> None:
 
     finally:
         camera.release()
+        mic.close()
         client.loop_stop()
         client.disconnect()
         logging.info("Shutdown complete.")
@@ -1,12 +1,45 @@
 """
 mic_processor.py
 
-Measures volume from the laptop microphone using a short blocking recording.
+Measures volume from the laptop microphone using a persistent input stream.
 Returns approximate volume in decibels (dB, negative values).
+
+The stream callback keeps the most recent measurement window in a ring
+buffer, so measure_volume_db() reads samples that are already captured
+instead of opening and blocking on a new recording every call. The stream
+is opened on the first measurement, so a missing or failing microphone
+shows up as a per-call error rather than at construction time.
 """
 
+import math
+import threading
+import time
+from typing import Optional
+
 import numpy as np
 import sounddevice as sd
+from numba import njit
+
+# If no audio callback arrives for this long, the stream is treated as dead
+MAX_CALLBACK_GAP_SEC = 1.0
+
+# int16 full-scale value, used to map raw samples back into [-1, 1]
+INT16_FULL_SCALE = 32768.0
+
+
+@njit(cache=True)
+def _mean_square(recording):
+    """Downmix, square and accumulate int16 (n_samples, channels) in one pass."""
+    n = recording.shape[0]
+    c = recording.shape[1]
+    s = 0
+    for i in range(n):
+        v = 0
+        for j in range(c):
+            v += np.int64(recording[i, j])
+        s += v * v
+    # Dividing by c*c here turns the channel sums into channel means
+    return s / (n * c * c)
 
 
 class MicrophoneProcessor:
@@ -25,26 +58,94 @@ class MicrophoneProcessor:
         self.block_duration = block_duration
         self.channels = channels
 
+        n_samples = int(self.samplerate * self.block_duration)
+        self._lock = threading.Lock()
+        self._ring = np.zeros((n_samples, self.channels), dtype=np.int16)
+        self._write_pos = 0
+        self._filled = 0
+        self._last_callback_time = 0.0
+        self.stream: Optional[sd.InputStream] = None
+
+        # Trigger JIT compilation now rather than under the lock on first use
+        _mean_square(self._ring[:1])
+
+    def _open_stream(self) -> None:
+        """Open and start a fresh input stream with an empty ring buffer."""
+        with self._lock:
+            self._write_pos = 0
+            self._filled = 0
+            self._last_callback_time = time.monotonic()
+
+        # Raw int16 samples halve the bytes moved compared with float32
+        self.stream = sd.InputStream(
+            samplerate=self.samplerate,
+            channels=self.channels,
+            dtype="int16",
+            callback=self._callback,
+        )
+        self.stream.start()
+
+    def _restart_stream(self, reason: str) -> None:
+        """Reopen a dead stream, then fail this measurement with `reason`."""
+        try:
+            self.close()
+        except sd.PortAudioError:
+            pass  # the old stream is already broken; just drop it
+        self._open_stream()
+        raise RuntimeError(f"{reason}; reopened input stream")
+
+    def _callback(self, indata: np.ndarray, frames: int, time_info, status) -> None:
+        """Copy a block from PortAudio into the ring buffer (audio thread)."""
+        size = self._ring.shape[0]
+        if frames >= size:
+            indata = indata[-size:]
+            frames = size
+
+        with self._lock:
+            start = self._write_pos
+            first = min(frames, size - start)
+            self._ring[start:start + first] = indata[:first]
+            self._ring[:frames - first] = indata[first:frames]
+            self._write_pos = (start + frames) % size
+            self._filled = min(size, self._filled + frames)
+            self._last_callback_time = time.monotonic()
+
     def measure_volume_db(self) -> float:
         """
-        Record a short block of audio and compute its RMS volume in dB.
+        Compute the RMS volume of the most recent audio window in dB.
 
         :return: volume in dB (negative number; closer to 0 = louder)
         """
-        n_samples = int(self.samplerate * self.block_duration)
+        # Open the stream on first use. A device error or unplug leaves it
+        # inactive or silent, so reopen it and report this iteration as failed
+        if self.stream is None:
+            self._open_stream()
+        elif not self.stream.active:
+            self._restart_stream("Microphone input stream is not running")
+        elif time.monotonic() - self._last_callback_time > MAX_CALLBACK_GAP_SEC:
+            self._restart_stream("Microphone stopped delivering audio")
 
-        # sounddevice returns float32 samples in [-1, 1]
-        recording = sd.rec(
-            n_samples,
-            samplerate=self.samplerate,
-            channels=self.channels,
-            dtype="float32",
-        )
-        sd.wait()
+        # Sample order doesn't matter for RMS, so the ring is used unrotated.
+        # The reduction is cheap enough to run under the lock, which saves
+        # copying the window out of the ring.
+        with self._lock:
+            if self._filled < self._ring.shape[0]:
+                raise RuntimeError("Microphone has not captured a full window yet")
+            mean_square = _mean_square(self._ring)
 
-        # Mono: average channels, then compute RMS
-        data = recording.mean(axis=1)
-        rms = float(np.sqrt(np.mean(data**2)) + 1e-12)  # avoid log(0)
+        rms = math.sqrt(mean_square) / INT16_FULL_SCALE
 
-        volume_db = 20 * np.log10(rms)
+        volume_db = 20.0 * math.log10(rms + 1e-12)  # avoid log(0)
         return volume_db
+
+    def close(self) -> None:
+        """Stop and close the input stream."""
+        if self.stream is not None:
+            stream, self.stream = self.stream, None
+            try:
+                stream.stop()
+            finally:
+                stream.close()
+
+    def __del__(self):
+        self.close()